@@ -1,7 +1,10 @@
 import os
 import json
 import boto3
+from assets import AssetManifest
 from auth import requires_auth
+from compression import ResponseCompression
+from load_shedding import analytics_limiter, coalesce
 from flask import Flask, request
 from flask import render_template, flash, redirect, url_for
 from flask import send_file, send_from_directory
@@ -14,6 +17,15 @@ def create_app(config_filename=None):
     if config_filename is not None:
         application.config.from_pyfile(config_filename)
 
+    # gzip/brotli responses and precompressed static variants
+    ResponseCompression(application)
+
+    # Self-hosted fonts/icons and critical CSS from the assets build step
+    AssetManifest(application)
+
+    # Shed excess analytics load before it reaches visitor tracking or S3
+    analytics_limiter.init_app(application, ['analytics', 'visitor_stats'])
+
     @application.route('/')
     @application.route('/index')
     @application.route('/home')
@@ -131,6 +143,7 @@ def create_app(config_filename=None):
     @application.route('/analytics')
     @application.route('/stats')
     @requires_auth
+    @coalesce
     def analytics():
         """Display visitor analytics dashboard"""
         stats = tracker.get_stats_for_template()
@@ -138,10 +151,17 @@ def create_app(config_filename=None):
 
     @application.route('/api/stats')
     @requires_auth
+    @coalesce
     def visitor_stats():
         """JSON API endpoint for visitor statistics"""
         return tracker.get_stats_for_api()
 
+    @application.route('/api/storage-health')
+    @requires_auth
+    def storage_health():
+        """Uncached S3 circuit breaker and spill state for all workers on this host"""
+        return tracker.storage_health()
+
     @application.errorhandler(404)
     def page_not_found(e):
         return render_template('404.html', title="Error"), 404
@@ -0,0 +1,355 @@
+"""
+Front-end Assets Module
+Builds self-hosted, subsetted and fingerprinted fonts/icons and exposes them to templates
+"""
+
+import os
+import re
+import sys
+import json
+import shutil
+import socket
+import hashlib
+import urllib.error
+import urllib.request
+from io import BytesIO
+from flask import request
+
+# fontTools is only needed at build time; without it fonts are vendored unsubsetted
+try:
+    from fontTools import subset as font_subset
+except ImportError:
+    font_subset = None
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+
+# SHA-256 of every downloaded source, committed so builds are reproducible
+LOCK_PATH = os.path.join(BASE_DIR, 'assets.lock.json')
+
+# Same family/weights the Google Fonts link in base.html asked for, from a pinned Fontsource release
+INTER_URL = 'https://cdn.jsdelivr.net/npm/@fontsource/inter@5.0.16'
+INTER_WEIGHTS = ('300', '400', '500', '600', '700')
+INTER_SUBSETS = ('latin', 'latin-ext')
+INTER_PRELOAD_WEIGHTS = ('400', '600')
+
+FONT_AWESOME_URL = 'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0'
+FONT_AWESOME_FONTS = ('fa-solid-900', 'fa-brands-400')
+
+
+class AssetIntegrityError(Exception):
+    """A downloaded source does not match its pinned hash"""
+
+
+class SourceLock:
+    """Pinned SHA-256 hashes for downloaded asset sources"""
+
+    def __init__(self, path=LOCK_PATH, update=False):
+        self.path = path
+        self.update = update
+        try:
+            with open(path, 'r') as f:
+                self.hashes = json.load(f)
+        except FileNotFoundError:
+            self.hashes = {}
+
+    def verify(self, url, data):
+        """Check data against the pinned hash, or record it when updating"""
+        digest = hashlib.sha256(data).hexdigest()
+        expected = self.hashes.get(url)
+        if expected is None and self.update:
+            self.hashes[url] = digest
+        elif expected is None:
+            raise AssetIntegrityError(f"No pinned hash for {url}; run 'python assets.py --update-lock' and review the lock file")
+        elif expected != digest:
+            raise AssetIntegrityError(f"Hash mismatch for {url}: expected {expected}, got {digest}")
+        return data
+
+    def save(self):
+        """Write recorded hashes back to the lock file"""
+        with open(self.path, 'w') as f:
+            json.dump(self.hashes, f, indent=2, sort_keys=True)
+            f.write('\n')
+
+# Rules from site.css needed to paint the header and the top of every page
+CRITICAL_SELECTORS = {
+    ':root', '*', 'html', 'body', 'h1', 'h2', 'h3', 'p', 'a',
+    '.main-header', '.navbar', '.nav-container', '.logo', '.logo-text',
+    '.nav-toggle', '.nav-menu', '.nav-link', '.main-content', '.container',
+    '.hero', '.hero-content', '.hero-description', '.cta-buttons',
+    '.btn', '.btn-primary', '.btn-secondary',
+    '.section', '.section-header', '.section-title', '.section-subtitle',
+}
+
+
+class AssetManifest:
+    """Resolves fingerprinted asset names produced by the build step"""
+
+    def __init__(self, application=None):
+        self.files = {}
+        self.preload = []
+        self.critical_css = ''
+        if application is not None:
+            self.init_app(application)
+
+    def init_app(self, application):
+        """Load the build manifest and register template/caching hooks"""
+        self.load(os.path.join(application.static_folder, DIST_DIR, MANIFEST_NAME))
+        application.context_processor(self.template_context)
+        application.after_request(self.cache_headers)
+
+    def load(self, manifest_path):
+        """Read the manifest written by build(); missing means use the CDN fallback"""
+        try:
+            with open(manifest_path, 'r') as f:
+                manifest = json.load(f)
+            critical_path = os.path.join(os.path.dirname(manifest_path), os.path.basename(manifest['files']['critical.css']))
+            with open(critical_path, 'r') as f:
+                self.critical_css = f.read()
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Warning: Could not load asset manifest {manifest_path}: {e}")
+            return
+
+        self.files = manifest['files']
+        self.preload = manifest.get('preload', [])
+
+    def url(self, name):
+        """Static filename of a built asset"""
+        return self.files[name]
+
+    def template_context(self):
+        """Expose the manifest to templates as `assets` when a build exists"""
+        return {'assets': self if self.files else None}
+
+    def cache_headers(self, response):
+        """Fingerprinted files never change, so let browsers keep them"""
+        if (request.endpoint == 'static' and response.status_code in (200, 304)
+                and request.view_args.get('filename', '').startswith(DIST_DIR + '/')):
+            # send_file marks every static file no-cache; these never need revalidating
+            response.cache_control.no_cache = None
+            response.cache_control.public = True
+            response.cache_control.max_age = 31536000
+            response.cache_control.immutable = True
+        return response
+
+
+def fetch(url, lock):
+    """Download a URL as bytes and verify it against the lock file"""
+    with urllib.request.urlopen(url, timeout=30) as response:
+        return lock.verify(url, response.read())
+
+
+def fingerprint(out_dir, name, content):
+    """Write content as name.<hash>.ext and return the file name"""
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    stem, ext = os.path.splitext(name)
+    digest = hashlib.md5(content).hexdigest()[:10]
+    filename = f"{stem}.{digest}{ext}"
+    with open(os.path.join(out_dir, filename), 'wb') as f:
+        f.write(content)
+    return filename
+
+
+def subset_font(data, codepoints):
+    """Keep only the given codepoints in a woff2 font"""
+    if font_subset is None:
+        print("Warning: fontTools not installed, vendoring full icon fonts")
+        return data
+
+    options = font_subset.Options()
+    options.flavor = 'woff2'
+    options.layout_features = ['*']
+    font = font_subset.load_font(BytesIO(data), options)
+    subsetter = font_subset.Subsetter(options)
+    subsetter.populate(unicodes=codepoints)
+    subsetter.subset(font)
+    output = BytesIO()
+    font_subset.save_font(font, output, options)
+    return output.getvalue()
+
+
+def strip_comments(css):
+    """Remove /* */ comments from CSS"""
+    return re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+
+
+def minify(css):
+    """Collapse whitespace in a CSS fragment"""
+    css = re.sub(r'\s+', ' ', css)
+    return re.sub(r'\s*([;{}])\s*', r'\1', css).strip()
+
+
+def split_rules(css):
+    """Split a stylesheet into top-level (prelude, body) pairs"""
+    rules = []
+    depth = 0
+    start = 0
+    body_start = 0
+    prelude = ''
+    for i, char in enumerate(css):
+        if char == '{':
+            if depth == 0:
+                prelude = css[start:i].strip()
+                body_start = i + 1
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                rules.append((prelude, css[body_start:i]))
+                start = i + 1
+    return rules
+
+
+def is_critical_selector(selector):
+    """Check if a selector's leading compound targets above-the-fold markup"""
+    first = selector.split()[0] if selector.split() else ''
+    match = re.match(r':root|\*|[.#]?[\w-]+', first)
+    return bool(match) and match.group(0) in CRITICAL_SELECTORS
+
+
+def extract_critical_css(css):
+    """Pick the rules from a stylesheet that are needed for first paint"""
+    output = []
+    for prelude, body in split_rules(strip_comments(css)):
+        if prelude.startswith('@media'):
+            inner = extract_critical_css(body)
+            if inner:
+                output.append(f"{minify(prelude)}{{{inner}}}")
+        elif prelude.startswith('@'):
+            # Keyframes, font-faces etc. arrive with the full stylesheet
+            continue
+        elif any(is_critical_selector(selector.strip()) for selector in prelude.split(',')):
+            output.append(f"{minify(prelude)}{{{minify(body)}}}")
+    return ''.join(output)
+
+
+def used_icons(template_folder):
+    """Collect Font Awesome icon classes referenced in the templates"""
+    icons = set()
+    for root, _dirs, files in os.walk(template_folder):
+        for name in files:
+            if name.endswith('.html'):
+                with open(os.path.join(root, name), 'r') as f:
+                    icons.update(re.findall(r'\bfa-[a-z0-9-]+', f.read()))
+    return icons
+
+
+def build_inter(out_dir, lock):
+    """Vendor the Inter @font-face rules and woff2 files; returns (css, preload)"""
+    output = []
+    preload = []
+    for weight in INTER_WEIGHTS:
+        css = fetch(f"{INTER_URL}/{weight}.css", lock).decode('utf-8')
+        # Fontsource labels each @font-face with its family, subset and weight
+        for subset, body in re.findall(r'/\*\s*inter-([\w-]+?)-\d+-normal\s*\*/\s*@font-face\s*{([^}]*)}', css):
+            if subset not in INTER_SUBSETS:
+                continue
+            source = f"inter-{subset}-{weight}-normal.woff2"
+            local_name = fingerprint(out_dir, source, fetch(f"{INTER_URL}/files/{source}", lock))
+            body = re.sub(r'src:[^;]+;?', f'src:url("{local_name}") format("woff2");', body)
+            output.append('@font-face{' + minify(body) + '}')
+            if subset == 'latin' and weight in INTER_PRELOAD_WEIGHTS:
+                preload.append(f"{DIST_DIR}/{local_name}")
+    return ''.join(output), preload
+
+
+def build_font_awesome(out_dir, icons, lock):
+    """Vendor a Font Awesome stylesheet and fonts trimmed to the used icons"""
+    css = strip_comments(fetch(f"{FONT_AWESOME_URL}/css/all.css", lock).decode('utf-8'))
+    output = []
+    codepoints = set()
+    vendored = {}
+    icon_selector = re.compile(r'^\.(fa-[a-z0-9-]+)::?before$')
+
+    for prelude, body in split_rules(css):
+        selectors = [selector.strip() for selector in prelude.split(',')]
+        matches = [icon_selector.match(selector) for selector in selectors]
+        if all(matches):
+            kept = [selector for selector, match in zip(selectors, matches) if match.group(1) in icons]
+            content = re.search(r'content:\s*"\\([0-9a-fA-F]+)"', body)
+            if kept and content:
+                codepoints.add(int(content.group(1), 16))
+                output.append(f"{','.join(kept)}{{{minify(body)}}}")
+        elif prelude.startswith('@font-face'):
+            font = re.search(r'webfonts/([\w-]+)\.woff2', body)
+            if font and font.group(1) in FONT_AWESOME_FONTS:
+                output.append(('@font-face', font.group(1), body))
+        else:
+            output.append(f"{minify(prelude)}{{{minify(body)}}}")
+
+    rendered = []
+    for rule in output:
+        if isinstance(rule, tuple):
+            _, font_name, body = rule
+            # The v5 compatibility faces reuse the same font files
+            if font_name not in vendored:
+                data = subset_font(fetch(f"{FONT_AWESOME_URL}/webfonts/{font_name}.woff2", lock), codepoints)
+                vendored[font_name] = fingerprint(out_dir, f"{font_name}.woff2", data)
+            src = f'src:url("{vendored[font_name]}") format("woff2")'
+            body = re.sub(r'src:[^;]+;?', src + ';', body)
+            rendered.append('@font-face{' + minify(body) + '}')
+        else:
+            rendered.append(rule)
+    return ''.join(rendered)
+
+
+def build(static_folder=None, template_folder=None, lock=None):
+    """Build fingerprinted vendor/critical CSS and fonts into static/dist
+
+    Output is written to a temporary folder and only swapped in once the
+    whole build succeeds, so a failed build leaves the previous one alone.
+    """
+    static_folder = static_folder or os.path.join(BASE_DIR, 'static')
+    template_folder = template_folder or os.path.join(BASE_DIR, 'templates')
+    lock = lock or SourceLock()
+    out_dir = os.path.join(static_folder, DIST_DIR)
+    build_dir = f"{out_dir}.building"
+    if os.path.isdir(build_dir):
+        shutil.rmtree(build_dir)
+    os.makedirs(build_dir)
+
+    try:
+        inter_css, preload = build_inter(build_dir, lock)
+        icons_css = build_font_awesome(build_dir, used_icons(template_folder), lock)
+
+        with open(os.path.join(static_folder, 'site.css'), 'r') as f:
+            site_css = f.read()
+
+        files = {
+            'vendor.css': f"{DIST_DIR}/" + fingerprint(build_dir, 'vendor.css', inter_css + icons_css),
+            'site.css': f"{DIST_DIR}/" + fingerprint(build_dir, 'site.css', site_css),
+            'critical.css': f"{DIST_DIR}/" + fingerprint(build_dir, 'critical.css', extract_critical_css(site_css)),
+        }
+        with open(os.path.join(build_dir, MANIFEST_NAME), 'w') as f:
+            json.dump({'files': files, 'preload': preload}, f, indent=2)
+    except Exception:
+        shutil.rmtree(build_dir, ignore_errors=True)
+        raise
+
+    if os.path.isdir(out_dir):
+        shutil.rmtree(out_dir)
+    os.rename(build_dir, out_dir)
+    return files
+
+
+if __name__ == "__main__":
+    # Build step: python assets.py [--update-lock]
+    source_lock = SourceLock(update='--update-lock' in sys.argv)
+    try:
+        built = build(lock=source_lock)
+    except (urllib.error.URLError, socket.timeout, ConnectionError) as e:
+        # Offline builds are allowed; base.html falls back to the CDN links
+        print(f"Warning: Could not download front-end assets, pages will use the CDN: {e}")
+        sys.exit(0)
+    except AssetIntegrityError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    if source_lock.update:
+        source_lock.save()
+    for name, path in built.items():
+        print(f"{name} -> static/{path}")
@@ -0,0 +1,225 @@
+"""
+Response Compression Module
+Negotiates gzip/brotli encoding for responses and serves precompressed static assets
+"""
+
+import os
+import gzip
+import zlib
+import mimetypes
+from flask import request, send_from_directory
+
+# Brotli is optional; without it only gzip is offered
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+DEFAULT_MIMETYPES = (
+    'text/html',
+    'text/css',
+    'text/plain',
+    'text/xml',
+    'text/javascript',
+    'application/javascript',
+    'application/json',
+    'application/xml',
+    'application/manifest+json',
+    'image/svg+xml',
+)
+
+# Static file extensions that get .gz/.br variants generated next to them
+PRECOMPRESS_EXTENSIONS = ('.css', '.js', '.svg', '.xml', '.json', '.webmanifest', '.txt', '.html')
+
+
+class ResponseCompression:
+    """Handles Accept-Encoding negotiation and compressed responses"""
+
+    def __init__(self, application=None):
+        if application is not None:
+            self.init_app(application)
+
+    def init_app(self, application):
+        """Register compression hooks and precompress static assets"""
+        config = application.config
+        config.setdefault('COMPRESS_MIMETYPES', DEFAULT_MIMETYPES)
+        config.setdefault('COMPRESS_MIN_SIZE', int(os.environ.get('COMPRESS_MIN_SIZE', 500)))
+        config.setdefault('COMPRESS_GZIP_LEVEL', 6)
+        config.setdefault('COMPRESS_BR_LEVEL', 5)
+        config.setdefault('COMPRESS_PRECOMPRESS_STATIC', os.environ.get('COMPRESS_PRECOMPRESS_STATIC', '1') != '0')
+
+        self.mimetypes = tuple(config['COMPRESS_MIMETYPES'])
+        self.min_size = config['COMPRESS_MIN_SIZE']
+        self.gzip_level = config['COMPRESS_GZIP_LEVEL']
+        self.br_level = config['COMPRESS_BR_LEVEL']
+        self.static_folder = application.static_folder
+
+        if config['COMPRESS_PRECOMPRESS_STATIC'] and self.static_folder:
+            precompress_static(self.static_folder)
+
+        application.before_request(self.serve_precompressed)
+        application.after_request(self.compress_response)
+
+    def choose_encoding(self, accept_encodings):
+        """Pick the best supported encoding from an Accept-Encoding header"""
+        br_quality = accept_encodings.quality('br') if brotli is not None else 0
+        gzip_quality = accept_encodings.quality('gzip')
+        if br_quality and br_quality >= gzip_quality:
+            return 'br'
+        if gzip_quality:
+            return 'gzip'
+        return None
+
+    def is_compressible(self, mimetype):
+        """Check if a mimetype is worth compressing"""
+        return mimetype in self.mimetypes
+
+    def serve_precompressed(self):
+        """Serve a .br/.gz variant of a static file when the client accepts it"""
+        if request.endpoint != 'static' or request.method not in ('GET', 'HEAD'):
+            return None
+
+        filename = request.view_args.get('filename') if request.view_args else None
+        if not filename or not filename.endswith(PRECOMPRESS_EXTENSIONS):
+            return None
+
+        encoding = self.choose_encoding(request.accept_encodings)
+        if encoding is None:
+            return None
+
+        suffix = '.br' if encoding == 'br' else '.gz'
+        original = os.path.join(self.static_folder, filename)
+        variant = original + suffix
+        # Variants outlive deploys, so the original may be gone or newer
+        if not os.path.isfile(original) or not os.path.isfile(variant):
+            return None
+        if os.path.getmtime(variant) < os.path.getmtime(original):
+            return None
+
+        # Keep the original file's type, not application/gzip
+        response = send_from_directory(self.static_folder, filename + suffix)
+        response.mimetype = _guess_mimetype(filename, response.mimetype)
+        response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        return response
+
+    def compress_response(self, response):
+        """Compress eligible responses according to the client's Accept-Encoding"""
+        if not self.is_compressible(response.mimetype):
+            return response
+
+        response.vary.add('Accept-Encoding')
+
+        # File responses have already answered conditional and range requests
+        # against the identity bytes; static files use the precompressed variants.
+        # HEAD is encoded like GET so both report the same headers.
+        if (response.status_code != 200
+                or response.direct_passthrough
+                or 'Content-Encoding' in response.headers
+                or 'Content-Range' in response.headers):
+            return response
+
+        encoding = self.choose_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            if response.content_length is not None and response.content_length < self.min_size:
+                return response
+            # Large/streamed bodies are encoded chunk by chunk as they are sent
+            response.response = self._stream_compress(response.response, encoding)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                return response
+            response.set_data(self._compress(data, encoding))
+
+        response.headers['Content-Encoding'] = encoding
+        # Byte ranges of the identity body do not apply to the encoded body
+        response.headers.pop('Accept-Ranges', None)
+        if response.headers.get('ETag'):
+            # Encoded bytes differ from the identity representation
+            response.set_etag(f"{response.get_etag()[0]}-{encoding}", weak=True)
+            response.make_conditional(request)
+        return response
+
+    def _compress(self, data, encoding):
+        """Compress a complete body in one pass"""
+        if encoding == 'br':
+            return brotli.compress(data, quality=self.br_level)
+        return gzip.compress(data, compresslevel=self.gzip_level)
+
+    def _stream_compress(self, chunks, encoding):
+        """Yield compressed output for an iterable of body chunks"""
+        if encoding == 'br':
+            compressor = brotli.Compressor(quality=self.br_level)
+            compress, finish = compressor.process, compressor.finish
+        else:
+            # wbits=31 produces a gzip container instead of a raw zlib stream
+            compressor = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 31)
+            compress, finish = compressor.compress, compressor.flush
+
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode('utf-8')
+                output = compress(chunk)
+                if output:
+                    yield output
+            yield finish()
+        finally:
+            if hasattr(chunks, 'close'):
+                chunks.close()
+
+
+def _guess_mimetype(filename, fallback):
+    """Mimetype of the uncompressed file"""
+    if filename.endswith('.webmanifest'):
+        return 'application/manifest+json'
+    return mimetypes.guess_type(filename)[0] or fallback
+
+
+def precompress_static(static_folder, gzip_level=9, br_level=11):
+    """Write .gz (and .br when available) variants for compressible static files"""
+    written = 0
+    for root, _dirs, files in os.walk(static_folder):
+        for name in files:
+            if not name.endswith(PRECOMPRESS_EXTENSIONS):
+                continue
+            path = os.path.join(root, name)
+            try:
+                mtime = os.path.getmtime(path)
+                with open(path, 'rb') as f:
+                    data = f.read()
+
+                variants = [('.gz', lambda d: gzip.compress(d, compresslevel=gzip_level, mtime=0))]
+                if brotli is not None:
+                    variants.append(('.br', lambda d: brotli.compress(d, quality=br_level)))
+
+                for suffix, compress in variants:
+                    target = path + suffix
+                    if os.path.isfile(target) and os.path.getmtime(target) >= mtime:
+                        continue
+                    compressed = compress(data)
+                    # Not worth serving if it does not actually save space
+                    if len(compressed) >= len(data):
+                        continue
+                    # Write then rename so concurrent workers never serve a partial file
+                    tmp_target = f"{target}.{os.getpid()}.tmp"
+                    with open(tmp_target, 'wb') as f:
+                        f.write(compressed)
+                    os.replace(tmp_target, target)
+                    written += 1
+            except OSError as e:
+                print(f"Warning: Could not precompress static file '{path}': {e}")
+    return written
+
+
+if __name__ == "__main__":
+    # Build step: python compression.py [static_folder]
+    import sys
+    folder = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+    count = precompress_static(folder)
+    print(f"Precompressed {count} static file variants in {folder}")
@@ -0,0 +1,197 @@
+"""
+Load shedding module for the authenticated analytics endpoints
+"""
+
+import os
+import json
+import time
+import fcntl
+import hashlib
+from flask import g, request, Response
+from auth import analytics_auth
+from state_dir import private_state_dir
+
+
+class Refused(Exception):
+    """Raised by a computation that may not start; carries the refusal response"""
+
+    def __init__(self, response):
+        super().__init__(response.status)
+        self.response = response
+
+
+class SingleFlight:
+    """Shares one computation between concurrent identical requests across worker processes
+
+    A per-key flock elects one leader; followers block on the same lock and
+    then read the leader's JSON result file, which doubles as a short cache.
+    Results hold visitor IPs, so lock_dir must be private to this user.
+    """
+
+    def __init__(self, lock_dir, ttl=10):
+        self.lock_dir = lock_dir
+        self.ttl = ttl
+
+    def _paths(self, key):
+        """Lock and result file for a key"""
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]
+        base = os.path.join(self.lock_dir, f"drinfo-flight-{digest}")
+        return f"{base}.lock", f"{base}.json"
+
+    def cached(self, key):
+        """Return (True, value) when a fresh result exists for key"""
+        _, result_path = self._paths(key)
+        try:
+            if time.time() - os.path.getmtime(result_path) >= self.ttl:
+                return False, None
+            with open(result_path, 'r') as f:
+                return True, json.load(f)['value']
+        except (OSError, ValueError, KeyError):
+            return False, None
+
+    def do(self, key, fn):
+        """Return fn()'s result for key, computing it at most once at a time on this host
+
+        fn only runs while holding the key's lock with no fresh result, so it
+        is the place to decide whether a computation may start.
+        """
+        hit, value = self.cached(key)
+        if hit:
+            return value
+
+        lock_path, result_path = self._paths(key)
+        fd = os.open(lock_path, os.O_CREAT | os.O_RDWR, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            # The leader we waited on has just written its result
+            hit, value = self.cached(key)
+            if hit:
+                return value
+
+            value = fn()
+            tmp_path = f"{result_path}.{os.getpid()}.tmp"
+            try:
+                tmp_fd = os.open(tmp_path, os.O_CREAT | os.O_WRONLY | os.O_TRUNC, 0o600)
+                with os.fdopen(tmp_fd, 'w') as f:
+                    json.dump({'value': value}, f)
+                os.replace(tmp_path, result_path)
+            except (OSError, TypeError) as e:
+                print(f"Warning: Could not share analytics result: {e}")
+            return value
+        finally:
+            os.close(fd)
+
+
+class AnalyticsLimiter:
+    """Caps analytics work per credential and overall
+
+    Slots are lock files shared by all gunicorn workers on the host. The
+    global limit counts every analytics request holding a worker and should
+    stay below the worker count so public pages always get one. The
+    per-credential limit counts distinct computations and is only taken once
+    a request is elected to compute, so identical requests join the one in
+    flight instead of being refused.
+    """
+
+    def __init__(self):
+        self.max_concurrent = int(os.environ.get('ANALYTICS_MAX_CONCURRENT', 2))
+        self.max_per_credential = int(os.environ.get('ANALYTICS_MAX_PER_CREDENTIAL', 1))
+        self.retry_after = int(os.environ.get('ANALYTICS_RETRY_AFTER', 2))
+        self.lock_dir = private_state_dir(os.environ.get('ANALYTICS_LOCK_DIR'))
+        self.endpoints = set()
+        self.flights = SingleFlight(self.lock_dir, ttl=float(os.environ.get('ANALYTICS_CACHE_SECONDS', 10)))
+
+    def init_app(self, application, endpoints):
+        """Register the limiter ahead of visitor tracking so shed requests stay cheap"""
+        self.endpoints.update(endpoints)
+        application.before_request(self.acquire)
+        application.teardown_request(self.release)
+
+    def _try_slot(self, prefix, count):
+        """Take one of count lock-file slots without waiting; returns the fd or None"""
+        for slot in range(count):
+            path = os.path.join(self.lock_dir, f"{prefix}-{slot}.lock")
+            fd = os.open(path, os.O_CREAT | os.O_RDWR, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fd
+            except BlockingIOError:
+                os.close(fd)
+        return None
+
+    def reject(self, status, message):
+        """Fast refusal with a Retry-After hint"""
+        return Response(message, status, {'Retry-After': str(self.retry_after)})
+
+    def _take_global_slot(self):
+        """Hold a global slot for this request; returns a 503 refusal if none is free"""
+        if 'analytics_slots' in g:
+            return None
+        global_fd = self._try_slot('drinfo-analytics-global', self.max_concurrent)
+        if global_fd is None:
+            return self.reject(503, 'Analytics is busy.\nPlease retry shortly.')
+        g.analytics_slots = [global_fd]
+        return None
+
+    def acquire(self):
+        """Shed an analytics request up front when every global slot is busy"""
+        if request.endpoint not in self.endpoints:
+            return None
+
+        # Unauthenticated requests are left to requires_auth and its cheap 401
+        auth = request.authorization
+        if not auth or not analytics_auth.check_credentials(auth.username, auth.password):
+            return None
+
+        # A fresh shared result is served without taking any slot
+        if self.flights.cached(request.endpoint)[0]:
+            return None
+
+        # Followers of a computation in flight also hold a worker, so they count here
+        return self._take_global_slot()
+
+    def admit(self):
+        """Take the slots a new computation needs; called by the elected leader
+
+        The cached result seen by acquire() may have expired since, so the
+        global slot is taken here if it was skipped.
+        """
+        refusal = self._take_global_slot()
+        if refusal is not None:
+            return refusal
+
+        credential = hashlib.sha256(request.authorization.username.encode('utf-8')).hexdigest()[:16]
+        credential_fd = self._try_slot(f"drinfo-analytics-user-{credential}", self.max_per_credential)
+        if credential_fd is None:
+            return self.reject(429, 'Too many concurrent analytics requests.\nPlease retry shortly.')
+        g.analytics_slots.append(credential_fd)
+        return None
+
+    def release(self, exc=None):
+        """Closing the lock files frees the slots"""
+        for fd in g.pop('analytics_slots', []):
+            os.close(fd)
+
+    def coalesce(self, f):
+        """Decorator sharing one computation between concurrent requests to an endpoint"""
+        def decorated(*args, **kwargs):
+            def compute():
+                refusal = self.admit()
+                if refusal is not None:
+                    raise Refused(refusal)
+                return f(*args, **kwargs)
+
+            # These views take no arguments, so the endpoint identifies the result
+            try:
+                return self.flights.do(request.endpoint, compute)
+            except Refused as e:
+                return e.response
+        decorated.__name__ = f.__name__
+        return decorated
+
+
+# Create a global instance for easy importing
+analytics_limiter = AnalyticsLimiter()
+
+# Convenience decorator for easy use
+coalesce = analytics_limiter.coalesce
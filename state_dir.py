@@ -0,0 +1,35 @@
+"""
+State Directory Module
+Private folder for the files worker processes share on this host
+"""
+
+import os
+import stat
+import tempfile
+
+
+def private_state_dir(path=None):
+    """Return a folder only this user can read, creating it if needed
+
+    Without a path the folder is named per user inside the shared temp
+    folder, so every worker finds the same one. If that name already exists
+    and is not a private folder owned by this user, a new random folder is
+    used instead of trusting it.
+    """
+    explicit = path is not None
+    path = path or os.path.join(tempfile.gettempdir(), f"drinfo-{os.getuid()}")
+    try:
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        info = os.lstat(path)
+    except OSError as e:
+        print(f"Warning: Could not create state folder {path}: {e}")
+        return tempfile.mkdtemp(prefix='drinfo-')
+
+    # An operator-chosen folder is trusted as configured
+    if explicit:
+        return path
+
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        print(f"Warning: State folder {path} is not private to this user, using a new one")
+        return tempfile.mkdtemp(prefix='drinfo-')
+    return path
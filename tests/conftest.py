@@ -1,6 +1,10 @@
+import os
 from app import create_app
 import pytest
 
+# Keep test runs from writing .gz/.br variants into the source tree's static folder
+os.environ.setdefault('COMPRESS_PRECOMPRESS_STATIC', '0')
+
 @pytest.fixture
 def app():
     app = create_app()
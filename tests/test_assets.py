@@ -0,0 +1,158 @@
+import json
+import pytest
+from flask import Flask, render_template_string
+from app import create_app
+from assets import (
+    AssetIntegrityError, AssetManifest, SourceLock, build_font_awesome,
+    extract_critical_css, used_icons
+)
+
+flask_app = create_app()
+
+STYLESHEET = """
+/* Header */
+:root { --primary: #566a6c; }
+.navbar { padding: 1rem; }
+.nav-link:hover { color: red; }
+.project-card { margin: 0; }
+@keyframes fade { from { opacity: 0; } to { opacity: 1; } }
+@media (max-width: 768px) {
+    .nav-menu { display: none; }
+    .footer { padding: 0; }
+}
+"""
+
+FONT_AWESOME_CSS = """
+.fa, .fas { font-family: "Font Awesome 6 Free"; }
+.fa-envelope::before { content: "\\f0e0"; }
+.fa-cloud-arrow-up::before, .fa-cloud-upload-alt::before { content: "\\f0ee"; }
+.fa-trash::before { content: "\\f1f8"; }
+@font-face { font-family: "Font Awesome 6 Free"; src: url("../webfonts/fa-solid-900.woff2") format("woff2"), url("../webfonts/fa-solid-900.ttf") format("truetype"); }
+@font-face { font-family: "Font Awesome 6 Free"; src: url("../webfonts/fa-regular-400.woff2") format("woff2"); }
+"""
+
+
+def test_extract_critical_css():
+    """
+    GIVEN a small stylesheet
+    WHEN critical CSS is extracted
+    THEN check that only above-the-fold rules are kept, including inside media queries
+    """
+    critical = extract_critical_css(STYLESHEET)
+    assert ":root{--primary: #566a6c;}" in critical
+    assert ".navbar{padding: 1rem;}" in critical
+    assert ".nav-link:hover{color: red;}" in critical
+    assert "@media (max-width: 768px){.nav-menu{display: none;}}" in critical
+    assert "project-card" not in critical
+    assert "footer" not in critical
+    assert "keyframes" not in critical
+
+
+def test_used_icons(tmp_path):
+    """
+    GIVEN a templates folder referencing Font Awesome icons
+    WHEN icons are collected
+    THEN check that every referenced icon class is found
+    """
+    (tmp_path / "page.html").write_text('<i class="fas fa-envelope"></i><i class="fab fa-github"></i>')
+    (tmp_path / "notes.txt").write_text('<i class="fas fa-trash"></i>')
+    assert used_icons(str(tmp_path)) == {"fa-envelope", "fa-github"}
+
+
+def test_font_awesome_subset(tmp_path, monkeypatch):
+    """
+    GIVEN the Font Awesome stylesheet and fonts
+    WHEN it is trimmed to the used icons
+    THEN check that unused icons and font faces are dropped and fonts are self-hosted
+    """
+    def fake_fetch(url, lock):
+        return FONT_AWESOME_CSS.encode("utf-8") if url.endswith(".css") else b"font"
+    monkeypatch.setattr("assets.fetch", fake_fetch)
+    monkeypatch.setattr("assets.subset_font", lambda data, codepoints: data)
+
+    css = build_font_awesome(str(tmp_path), {"fa-envelope", "fa-cloud-upload-alt"}, lock=None)
+    assert ".fa-envelope::before" in css
+    assert ".fa-cloud-upload-alt::before" in css
+    assert "fa-cloud-arrow-up" not in css
+    assert "fa-trash" not in css
+    assert "fa-regular-400" not in css
+    assert "webfonts/" not in css
+    assert len(list(tmp_path.glob("fa-solid-900.*.woff2"))) == 1
+
+
+def test_source_lock(tmp_path):
+    """
+    GIVEN a lock file pinning a source hash
+    WHEN downloaded bytes are verified
+    THEN check that unknown or modified sources are rejected
+    """
+    lock = SourceLock(path=str(tmp_path / "assets.lock.json"), update=True)
+    lock.verify("https://example.com/a.css", b"body{}")
+    lock.save()
+
+    pinned = SourceLock(path=str(tmp_path / "assets.lock.json"))
+    assert pinned.verify("https://example.com/a.css", b"body{}") == b"body{}"
+    with pytest.raises(AssetIntegrityError):
+        pinned.verify("https://example.com/a.css", b"body{color:red}")
+    with pytest.raises(AssetIntegrityError):
+        pinned.verify("https://example.com/b.css", b"body{}")
+
+
+def test_base_template_with_manifest(tmp_path):
+    """
+    GIVEN a built asset manifest
+    WHEN a page extending base.html is rendered
+    THEN check that fonts are preloaded, critical CSS is inlined and no CDN is used
+    """
+    (tmp_path / "critical.abc.css").write_text(".navbar{padding:1rem}")
+    (tmp_path / "manifest.json").write_text(json.dumps({
+        "files": {
+            "vendor.css": "dist/vendor.abc.css",
+            "site.css": "dist/site.abc.css",
+            "critical.css": "dist/critical.abc.css"
+        },
+        "preload": ["dist/inter-latin-400-normal.abc.woff2"]
+    }))
+    manifest = AssetManifest()
+    manifest.load(str(tmp_path / "manifest.json"))
+
+    with flask_app.test_request_context("/"):
+        html = render_template_string('{% extends "base.html" %}', assets=manifest)
+    assert '<link rel="preload" href="/static/dist/inter-latin-400-normal.abc.woff2" as="font"' in html
+    assert "<style>.navbar{padding:1rem}</style>" in html
+    assert "/static/dist/vendor.abc.css" in html
+    assert "/static/dist/site.abc.css" in html
+    assert "fonts.googleapis.com" not in html
+    assert "cdnjs.cloudflare.com" not in html
+
+
+def test_base_template_without_manifest():
+    """
+    GIVEN no asset build
+    WHEN a page extending base.html is rendered
+    THEN check that the CDN links are used
+    """
+    with flask_app.test_request_context("/"):
+        html = render_template_string('{% extends "base.html" %}', assets=None)
+    assert "fonts.googleapis.com" in html
+    assert "/static/site.css" in html
+
+
+def test_dist_files_cached_immutably(tmp_path):
+    """
+    GIVEN a fingerprinted file in static/dist
+    WHEN it is requested
+    THEN check that browsers may cache it for a year without revalidating
+    """
+    (tmp_path / "dist").mkdir()
+    (tmp_path / "dist" / "site.abc.css").write_text("body{}")
+    (tmp_path / "site.css").write_text("body{}")
+    application = Flask(__name__, static_folder=str(tmp_path))
+    AssetManifest(application)
+
+    with application.test_client() as client:
+        fingerprinted = client.get("/static/dist/site.abc.css")
+        plain = client.get("/static/site.css")
+    assert fingerprinted.status_code == 200
+    assert set(fingerprinted.headers["Cache-Control"].split(", ")) == {"public", "max-age=31536000", "immutable"}
+    assert "immutable" not in plain.headers.get("Cache-Control", "")
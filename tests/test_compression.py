@@ -0,0 +1,86 @@
+import gzip
+import pytest
+from flask import Flask
+from app import create_app
+from compression import ResponseCompression
+
+flask_app = create_app()
+
+STYLESHEET = b"body { margin: 0; padding: 0; }\n" * 100
+
+
+@pytest.fixture
+def static_client(tmp_path):
+    """Test client for an app serving and precompressing a temporary static folder"""
+    (tmp_path / "site.css").write_bytes(STYLESHEET)
+    application = Flask(__name__, static_folder=str(tmp_path))
+    application.config['COMPRESS_PRECOMPRESS_STATIC'] = True
+    ResponseCompression(application)
+    with application.test_client() as client:
+        yield client
+
+
+with flask_app.test_client() as test_client:
+
+    def test_gzip_html():
+        """
+        GIVEN a Flask application configured for testing
+        WHEN a page is requested with Accept-Encoding: gzip
+        THEN check that the response is gzip encoded and varies on Accept-Encoding
+        """
+        response = test_client.get("/about", headers={"Accept-Encoding": "gzip"})
+        assert response.status_code == 200
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["Vary"]
+        assert b"</html>" in gzip.decompress(response.data)
+
+    def test_head_matches_get():
+        """
+        GIVEN a Flask application configured for testing
+        WHEN a page is requested with HEAD and GET using the same Accept-Encoding
+        THEN check that both report the same encoding and length
+        """
+        get = test_client.get("/about", headers={"Accept-Encoding": "gzip"})
+        head = test_client.head("/about", headers={"Accept-Encoding": "gzip"})
+        assert head.status_code == 200
+        assert head.headers["Content-Encoding"] == get.headers["Content-Encoding"]
+        assert head.headers["Content-Length"] == get.headers["Content-Length"]
+        assert head.data == b""
+
+    def test_identity_html():
+        """
+        GIVEN a Flask application configured for testing
+        WHEN a page is requested without Accept-Encoding
+        THEN check that the response is not encoded
+        """
+        response = test_client.get("/about")
+        assert response.status_code == 200
+        assert "Content-Encoding" not in response.headers
+        assert b"</html>" in response.data
+
+
+def test_precompressed_static(static_client, tmp_path):
+    """
+    GIVEN a static folder precompressed at startup
+    WHEN a static stylesheet is requested with Accept-Encoding: gzip
+    THEN check that the precompressed variant is served as text/css
+    """
+    assert (tmp_path / "site.css.gz").is_file()
+    response = static_client.get("/static/site.css", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.mimetype == "text/css"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    response.direct_passthrough = False
+    assert gzip.decompress(response.get_data()) == STYLESHEET
+
+
+def test_orphaned_variant(static_client, tmp_path):
+    """
+    GIVEN a precompressed variant whose original file no longer exists
+    WHEN the original is requested with Accept-Encoding: gzip
+    THEN check that the response is a 404, not a server error
+    """
+    (tmp_path / "orphaned.css.gz").write_bytes(gzip.compress(b"body {}"))
+    response = static_client.get("/static/orphaned.css", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 404
@@ -0,0 +1,149 @@
+import time
+import base64
+import threading
+import pytest
+from app import create_app
+from auth import analytics_auth
+from load_shedding import analytics_limiter
+from visitor_tracking import tracker
+
+flask_app = create_app()
+
+AUTH_HEADERS = {"Authorization": "Basic " + base64.b64encode(b"admin:secret").decode("ascii")}
+
+
+@pytest.fixture
+def limiter(tmp_path, monkeypatch):
+    monkeypatch.setattr(analytics_auth, "username", "admin")
+    monkeypatch.setattr(analytics_auth, "password", "secret")
+    monkeypatch.setattr(analytics_limiter, "lock_dir", str(tmp_path))
+    monkeypatch.setattr(analytics_limiter.flights, "lock_dir", str(tmp_path))
+    return analytics_limiter
+
+
+@pytest.fixture
+def slow_stats(monkeypatch):
+    """Stats computations that block until released, counting calls"""
+    release = threading.Event()
+    calls = []
+
+    def slow(*args, **kwargs):
+        calls.append(1)
+        release.wait(5)
+        return {"status": "success"}
+
+    monkeypatch.setattr(tracker, "get_stats_for_api", slow)
+    monkeypatch.setattr(tracker, "get_stats_for_template", slow)
+    yield release, calls
+    release.set()
+
+
+def request_in_thread(path, responses):
+    """GET path with analytics credentials from a new thread"""
+    def run():
+        with flask_app.test_client() as client:
+            responses.append(client.get(path, headers=AUTH_HEADERS))
+    thread = threading.Thread(target=run)
+    thread.start()
+    # Give the request time to reach the computation or its lock
+    time.sleep(0.2)
+    return thread
+
+
+def test_identical_requests_coalesce(limiter, slow_stats):
+    """
+    GIVEN an authenticated stats computation in progress
+    WHEN an identical stats request arrives
+    THEN check that both share one computation
+    """
+    release, calls = slow_stats
+    responses = []
+    threads = [request_in_thread("/api/stats", responses) for _ in range(2)]
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert [response.status_code for response in responses] == [200, 200]
+    assert len(calls) == 1
+
+
+def test_second_computation_per_credential_refused(limiter, slow_stats):
+    """
+    GIVEN an authenticated stats computation in progress
+    WHEN the same credential starts a different analytics computation
+    THEN check that it is refused with 429 and Retry-After
+    """
+    release, calls = slow_stats
+    responses = []
+    thread = request_in_thread("/api/stats", responses)
+
+    with flask_app.test_client() as client:
+        response = client.get("/analytics", headers=AUTH_HEADERS)
+    release.set()
+    thread.join()
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == str(limiter.retry_after)
+    assert len(calls) == 1
+
+
+def test_global_limit_sheds(limiter, slow_stats):
+    """
+    GIVEN analytics requests holding every global slot
+    WHEN another analytics request arrives
+    THEN check that it is refused with 503 and Retry-After
+    """
+    release, calls = slow_stats
+    responses = []
+    threads = [request_in_thread("/api/stats", responses) for _ in range(limiter.max_concurrent)]
+
+    with flask_app.test_client() as client:
+        response = client.get("/api/stats", headers=AUTH_HEADERS)
+        public = client.get("/about")
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(limiter.retry_after)
+    assert public.status_code == 200
+
+
+def test_cached_result_skips_limits(limiter, slow_stats, tmp_path):
+    """
+    GIVEN a fresh shared stats result
+    WHEN stats are requested again
+    THEN check that it is served from the cache without recomputing and is private to its owner
+    """
+    release, calls = slow_stats
+    release.set()
+    with flask_app.test_client() as client:
+        first = client.get("/api/stats", headers=AUTH_HEADERS)
+        second = client.get("/api/stats", headers=AUTH_HEADERS)
+
+    assert first.status_code == second.status_code == 200
+    assert second.get_json() == {"status": "success"}
+    assert len(calls) == 1
+    results = list(tmp_path.glob("drinfo-flight-*.json"))
+    assert results
+    assert all(path.stat().st_mode & 0o077 == 0 for path in results)
+
+
+def test_expired_result_needs_slots(limiter, slow_stats):
+    """
+    GIVEN a request let in on a cached result that expired before its view ran
+    WHEN the view has to compute while the credential's slot is taken
+    THEN check that it is refused with 429 instead of computing without a slot
+    """
+    release, calls = slow_stats
+    responses = []
+    thread = request_in_thread("/api/stats", responses)
+
+    # Skip acquire(), as a request admitted on the cached fast path does
+    with flask_app.test_request_context("/analytics", headers=AUTH_HEADERS):
+        response = limiter.coalesce(lambda: "computed")()
+    release.set()
+    thread.join()
+
+    assert response.status_code == 429
+    assert len(calls) == 1
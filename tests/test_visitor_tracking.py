@@ -0,0 +1,286 @@
+import os
+import glob
+import json
+import hashlib
+import pytest
+from botocore.exceptions import ClientError
+from visitor_tracking import CircuitBreaker, LocalSpill, VisitorTracker
+
+
+class FakeS3:
+    """In-memory stand-in for the boto3 S3 client"""
+
+    class exceptions:
+        class NoSuchKey(Exception):
+            pass
+
+    def __init__(self):
+        self.body = None
+        self.down = False
+        self.put_down = False
+        self.gets = 0
+        self.full_gets = 0
+        self.puts = 0
+
+    def etag(self):
+        return '"%s"' % hashlib.md5(self.body.encode('utf-8')).hexdigest()
+
+    def get_object(self, Bucket, Key, IfNoneMatch=None):
+        self.gets += 1
+        if self.down:
+            raise TimeoutError("S3 read timed out")
+        if self.body is None:
+            raise self.exceptions.NoSuchKey()
+        if IfNoneMatch == self.etag():
+            raise ClientError(
+                {'Error': {'Code': '304', 'Message': 'Not Modified'}, 'ResponseMetadata': {'HTTPStatusCode': 304}},
+                'GetObject'
+            )
+        self.full_gets += 1
+        body = self.body.encode('utf-8')
+        return {'ETag': self.etag(), 'Body': type('Body', (), {'read': lambda self: body})()}
+
+    def put_object(self, Bucket, Key, Body, ContentType):
+        self.puts += 1
+        if self.down or self.put_down:
+            raise TimeoutError("S3 write timed out")
+        self.body = Body
+        return {'ETag': self.etag()}
+
+    def document(self):
+        return json.loads(self.body)
+
+
+@pytest.fixture
+def s3():
+    return FakeS3()
+
+
+@pytest.fixture
+def visitor_tracker(s3, tmp_path, monkeypatch):
+    monkeypatch.setenv('VISITOR_SPILL_PATH', str(tmp_path / 'spill.jsonl'))
+    monkeypatch.delenv('VISITOR_MIRROR_PATH', raising=False)
+    tracker = VisitorTracker()
+    tracker.s3_client = s3
+    tracker.breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60, state_dir=str(tmp_path))
+    return tracker
+
+
+def test_breaker_opens_and_recovers(visitor_tracker, s3):
+    """
+    GIVEN a tracker whose S3 bucket stops responding
+    WHEN visits keep arriving until the breaker opens, and S3 later recovers
+    THEN check that S3 is not called while open and one probe closes the circuit
+    """
+    s3.down = True
+    for _ in range(3):
+        visitor_tracker.track_visitor('8.8.8.8', 'test', 'index')
+    assert visitor_tracker.breaker.state == CircuitBreaker.OPEN
+
+    calls = s3.gets + s3.puts
+    visitor_tracker.track_visitor('8.8.8.8', 'test', 'index')
+    assert s3.gets + s3.puts == calls
+
+    s3.down = False
+    visitor_tracker.breaker.opened_at -= 61
+    visitor_tracker.track_visitor('8.8.8.8', 'test', 'index')
+    assert visitor_tracker.breaker.state == CircuitBreaker.CLOSED
+    assert visitor_tracker.breaker.failures == 0
+
+
+def test_half_open_allows_single_probe():
+    """
+    GIVEN an open breaker past its reset timeout
+    WHEN two callers ask to use S3
+    THEN check that only the first is let through
+    """
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.allow_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_spilled_visits_replayed(visitor_tracker, s3):
+    """
+    GIVEN visits spilled locally during an S3 outage
+    WHEN S3 recovers and another visit is tracked
+    THEN check that every visit lands in S3 and the spill is empty
+    """
+    s3.down = True
+    visitor_tracker.track_visitor('8.8.8.8', 'test', 'index')
+    visitor_tracker.track_visitor('8.8.4.4', 'test', 'about')
+    assert visitor_tracker.spill.pending() == 2
+
+    s3.down = False
+    visitor_tracker.track_visitor('1.1.1.1', 'test', 'index')
+    document = s3.document()
+    assert document['total_pageviews'] == 3
+    assert document['unique_visitors'] == 3
+    assert visitor_tracker.spill.pending() == 0
+    assert glob.glob(visitor_tracker.spill.path + '*.replay') == []
+
+
+def test_replay_kept_when_write_fails(visitor_tracker, s3):
+    """
+    GIVEN a spilled visit and an S3 bucket that can be read but not written
+    WHEN a visit is tracked
+    THEN check that the claimed visit stays on disk for the next replay
+    """
+    s3.down = True
+    visitor_tracker.track_visitor('8.8.8.8', 'test', 'index')
+    s3.down = False
+    s3.put_down = True
+    visitor_tracker.track_visitor('8.8.4.4', 'test', 'index')
+    assert visitor_tracker.spill.pending() == 2
+
+    s3.put_down = False
+    visitor_tracker.track_visitor('1.1.1.1', 'test', 'index')
+    assert s3.document()['total_pageviews'] == 3
+    assert visitor_tracker.spill.pending() == 0
+
+
+def test_orphaned_replay_claimed(tmp_path):
+    """
+    GIVEN a replay batch left behind by a worker that died mid-replay
+    WHEN the spill is claimed
+    THEN check that its events are returned and removed on commit
+    """
+    spill = LocalSpill(str(tmp_path / 'spill.jsonl'))
+    orphan = tmp_path / 'spill.jsonl.99999.1.replay'
+    orphan.write_text(json.dumps({'ip': '8.8.8.8'}) + '\n')
+    spill.append({'ip': '8.8.4.4'})
+
+    events, batch = spill.claim()
+    assert sorted(event['ip'] for event in events) == ['8.8.4.4', '8.8.8.8']
+
+    # A concurrent claim must not replay the same batch twice
+    assert spill.claim() == ([], [])
+
+    spill.commit(batch)
+    assert spill.pending() == 0
+    assert not orphan.exists()
+
+
+def test_spill_bounded(tmp_path):
+    """
+    GIVEN a spill file with a small size limit
+    WHEN more visits arrive than fit
+    THEN check that the excess is dropped and counted
+    """
+    spill = LocalSpill(str(tmp_path / 'spill.jsonl'), max_bytes=40)
+    for _ in range(5):
+        spill.append({'ip': '8.8.8.8'})
+    assert spill.pending() == 2
+    assert spill.dropped == 3
+
+
+def test_storage_health_lists_workers(visitor_tracker):
+    """
+    GIVEN a tracker publishing its breaker state
+    WHEN storage health is requested
+    THEN check that this worker is reported with its pid
+    """
+    visitor_tracker.breaker.record_failure()
+    health = visitor_tracker.storage_health()
+    pids = [worker['pid'] for worker in health['workers']]
+    assert health['pid'] in pids
+
+
+def test_stale_worker_state_pruned(tmp_path):
+    """
+    GIVEN breaker state left behind by a worker that died, under a pid now in use
+    WHEN the state of all workers is read
+    THEN check that the stale state is ignored and removed
+    """
+    breaker = CircuitBreaker(state_dir=str(tmp_path))
+    stale = tmp_path / 'drinfo-s3-breaker-99999.json'
+    stale.write_text(json.dumps({'pid': os.getpid(), 'state': CircuitBreaker.OPEN}))
+
+    workers = CircuitBreaker.all_workers(str(tmp_path))
+    assert [worker['state'] for worker in workers] == [breaker.state]
+    assert not stale.exists()
+
+
+def test_state_files_private(visitor_tracker, s3):
+    """
+    GIVEN a tracker spilling a visit during an S3 outage
+    WHEN the spill and breaker state are written
+    THEN check that only the owner can read them
+    """
+    s3.down = True
+    visitor_tracker.track_visitor('8.8.8.8', 'test', 'index')
+    state_path = os.path.join(visitor_tracker.breaker.state_dir, 'drinfo-s3-breaker-%d.json' % os.getpid())
+    for path in (visitor_tracker.spill.path, state_path):
+        assert os.stat(path).st_mode & 0o077 == 0
+
+
+def test_not_modified_skips_parse(visitor_tracker, s3):
+    """
+    GIVEN a tracker whose mirror matches the S3 document
+    WHEN stats are read after the mirror has gone stale
+    THEN check that S3 answers 304 and no body is transferred
+    """
+    visitor_tracker.track_visitor('8.8.8.8', 'test', 'index')
+    visitor_tracker.mirror.checked_at = 0
+    gets, full_gets = s3.gets, s3.full_gets
+
+    assert visitor_tracker.load_visitor_data()['total_pageviews'] == 1
+    assert s3.gets == gets + 1
+    assert s3.full_gets == full_gets
+
+
+def test_fresh_mirror_does_not_touch_breaker(visitor_tracker, s3):
+    """
+    GIVEN an open breaker past its reset timeout and a fresh mirror
+    WHEN stats are read
+    THEN check that the mirror is served and the half-open probe is not used up
+    """
+    visitor_tracker.track_visitor('8.8.8.8', 'test', 'index')
+    for _ in range(3):
+        visitor_tracker.breaker.record_failure()
+    visitor_tracker.breaker.opened_at -= 61
+    gets = s3.gets
+
+    assert visitor_tracker.load_visitor_data()['total_pageviews'] == 1
+    assert s3.gets == gets
+    assert visitor_tracker.breaker.state == CircuitBreaker.OPEN
+    assert visitor_tracker.breaker.failures == 3
+
+
+def test_mirror_survives_outage(visitor_tracker, s3):
+    """
+    GIVEN a tracker that has written one visit
+    WHEN S3 fails a write and a stale read
+    THEN check that the last good snapshot is still served
+    """
+    visitor_tracker.track_visitor('8.8.8.8', 'test', 'index')
+    s3.put_down = True
+    visitor_tracker.track_visitor('8.8.4.4', 'test', 'index')
+    assert visitor_tracker.mirror.data['total_pageviews'] == 1
+
+    s3.down = True
+    visitor_tracker.mirror.checked_at = 0
+    assert visitor_tracker.load_visitor_data()['total_pageviews'] == 1
+
+
+def test_mirror_restored_from_disk(s3, tmp_path, monkeypatch):
+    """
+    GIVEN a mirror persisted to disk by a previous process
+    WHEN a new tracker reads stats
+    THEN check that the document is revalidated with a 304 instead of downloaded
+    """
+    monkeypatch.setenv('VISITOR_SPILL_PATH', str(tmp_path / 'spill.jsonl'))
+    monkeypatch.setenv('VISITOR_MIRROR_PATH', str(tmp_path / 'mirror.json'))
+    first = VisitorTracker()
+    first.s3_client = s3
+    first.track_visitor('8.8.8.8', 'test', 'index')
+
+    second = VisitorTracker()
+    second.s3_client = s3
+    assert second.mirror.etag == s3.etag()
+    full_gets = s3.full_gets
+    assert second.load_visitor_data()['total_pageviews'] == 1
+    assert s3.full_gets == full_gets
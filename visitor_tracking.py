@@ -4,11 +4,359 @@ Handles IP-based visitor analytics with S3 storage
 """
 
 import os
+import copy
+import glob
 import json
+import time
+import fcntl
 import boto3
+import atexit
+import threading
 import ipaddress
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from user_agents import parse
+from state_dir import private_state_dir
+
+
+class CircuitBreaker:
+    """Stops calling S3 after repeated failures and periodically lets a probe through"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=3, reset_timeout=30, state_dir=None):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state_dir = state_dir
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.last_failure = None
+        self._lock = threading.Lock()
+        # Held for the life of the worker so readers can tell live state files from stale ones
+        self._alive_fd = None
+        self._alive_pid = None
+        self._publish()
+
+    def allow_request(self):
+        """Check if a call to S3 should be attempted"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                # Let a single probe through; everyone else keeps failing fast
+                self.state = self.HALF_OPEN
+                self._publish()
+                return True
+            return False
+
+    def record_success(self):
+        """Close the circuit after a successful call"""
+        with self._lock:
+            if self.state == self.CLOSED and self.failures == 0:
+                return
+            if self.state != self.CLOSED:
+                print("S3 circuit closed, storage recovered")
+            self.state = self.CLOSED
+            self.failures = 0
+            self.opened_at = None
+            self._publish()
+
+    def record_failure(self):
+        """Count a failed call and open the circuit when the threshold is reached"""
+        with self._lock:
+            self.failures += 1
+            self.last_failure = datetime.now().isoformat()
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    print(f"Warning: S3 circuit opened after {self.failures} failures")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+            self._publish()
+
+    def _status(self):
+        """Breaker state; caller holds the lock"""
+        retry_in = None
+        if self.state == self.OPEN:
+            retry_in = max(0, round(self.reset_timeout - (time.monotonic() - self.opened_at)))
+        return {
+            'pid': os.getpid(),
+            'state': self.state,
+            'consecutive_failures': self.failures,
+            'last_failure': self.last_failure,
+            'retry_in_seconds': retry_in,
+            'updated': datetime.now().isoformat()
+        }
+
+    def status(self):
+        """Return breaker state for operators"""
+        with self._lock:
+            return self._status()
+
+    @staticmethod
+    def _state_path(state_dir, pid):
+        """State file and liveness lock file of a worker"""
+        base = os.path.join(state_dir, f"drinfo-s3-breaker-{pid}")
+        return f"{base}.json", f"{base}.lock"
+
+    def _hold_alive_lock(self):
+        """Lock this worker's liveness file, again after a fork"""
+        pid = os.getpid()
+        if self._alive_pid == pid:
+            return
+        _, lock_path = self._state_path(self.state_dir, pid)
+        fd = os.open(lock_path, os.O_CREAT | os.O_RDWR, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            self._alive_fd = fd
+        except BlockingIOError:
+            # Another breaker in this process already holds it
+            os.close(fd)
+        self._alive_pid = pid
+        atexit.register(self._remove_state, pid)
+
+    def _remove_state(self, pid):
+        """Delete this worker's state files when it exits"""
+        if pid != os.getpid():
+            return
+        for path in self._state_path(self.state_dir, pid):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _publish(self):
+        """Write this worker's breaker state where other workers can report it"""
+        if not self.state_dir:
+            return
+        try:
+            self._hold_alive_lock()
+            path, _ = self._state_path(self.state_dir, os.getpid())
+            tmp_path = f"{path}.tmp"
+            fd = os.open(tmp_path, os.O_CREAT | os.O_WRONLY | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self._status(), f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Warning: Could not write S3 breaker state: {e}")
+
+    @classmethod
+    def all_workers(cls, state_dir):
+        """Read the breaker state published by every live worker on this host
+
+        A worker holds a lock on its state for as long as it runs; state whose
+        lock can be taken was left by a worker that died and is removed, even
+        if its pid has since been reused.
+        """
+        workers = []
+        for path in glob.glob(os.path.join(state_dir, 'drinfo-s3-breaker-*.json')):
+            lock_path = path[:-len('.json')] + '.lock'
+            try:
+                fd = os.open(lock_path, os.O_RDWR)
+            except FileNotFoundError:
+                fd = None
+            except OSError:
+                continue
+            try:
+                if fd is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                for stale_path in (path, lock_path):
+                    try:
+                        os.remove(stale_path)
+                    except OSError:
+                        pass
+                continue
+            except BlockingIOError:
+                pass
+            finally:
+                if fd is not None:
+                    os.close(fd)
+
+            try:
+                with open(path, 'r') as f:
+                    workers.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return sorted(workers, key=lambda status: status['pid'])
+
+
+class LocalSpill:
+    """Bounded local JSON-lines file holding visits that could not be written to S3
+
+    Appends and claims are serialized across worker processes with flock.
+    Claimed batches are renamed to *.replay files and only deleted once the
+    replay has been written to S3; a batch left by a dead worker is unlocked
+    and gets picked up by the next claim.
+    """
+
+    def __init__(self, path, max_bytes=5 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.dropped = 0
+
+    @contextmanager
+    def _locked(self):
+        """Hold an exclusive lock shared by all processes using this spill file"""
+        fd = os.open(f"{self.path}.lock", os.O_CREAT | os.O_RDWR, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
+
+    def _files(self):
+        """The spill file and any replay batches waiting next to it"""
+        return [self.path] + glob.glob(f"{glob.escape(self.path)}.*.replay")
+
+    def append(self, event):
+        """Append a visit event, dropping it if the spill is full"""
+        line = json.dumps(event) + '\n'
+        try:
+            with self._locked():
+                size = sum(os.path.getsize(path) for path in self._files() if os.path.exists(path))
+                if size + len(line) > self.max_bytes:
+                    self.dropped += 1
+                    print(f"Warning: Visitor spill file full, dropped visit ({self.dropped} dropped)")
+                    return
+                # Visits hold client IPs, so only this user may read the spill
+                fd = os.open(self.path, os.O_CREAT | os.O_WRONLY | os.O_APPEND, 0o600)
+                with os.fdopen(fd, 'a') as f:
+                    f.write(line)
+        except OSError as e:
+            self.dropped += 1
+            print(f"Warning: Could not write visitor spill file: {e}")
+
+    def claim(self):
+        """Take spilled events for replay; returns (events, batch)
+
+        Pass batch to commit() once the events are safely in S3, or to
+        release() to leave them for a later replay.
+        """
+        events = []
+        batch = []
+        try:
+            with self._locked():
+                if os.path.exists(self.path):
+                    os.replace(self.path, f"{self.path}.{os.getpid()}.{time.time_ns()}.replay")
+                replay_paths = self._files()[1:]
+        except OSError as e:
+            print(f"Warning: Could not claim visitor spill file: {e}")
+            return events, batch
+
+        for path in replay_paths:
+            try:
+                fd = os.open(path, os.O_RDWR)
+            except FileNotFoundError:
+                continue
+            try:
+                # Held by a worker that is replaying it right now
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                continue
+            if os.fstat(fd).st_nlink == 0:
+                # Committed and removed while we were opening it
+                os.close(fd)
+                continue
+
+            with os.fdopen(os.dup(fd), 'r') as f:
+                for line in f:
+                    try:
+                        events.append(json.loads(line))
+                    except ValueError:
+                        # Skip a partially written line
+                        continue
+            batch.append((fd, path))
+        return events, batch
+
+    def commit(self, batch):
+        """Delete replay batches whose events reached S3"""
+        for fd, path in batch:
+            try:
+                os.remove(path)
+            except OSError as e:
+                print(f"Warning: Could not remove replayed spill file {path}: {e}")
+            os.close(fd)
+
+    def release(self, batch):
+        """Unlock replay batches so a later claim retries them"""
+        for fd, _path in batch:
+            os.close(fd)
+
+    def pending(self):
+        """Number of visits waiting to be replayed"""
+        count = 0
+        for path in self._files():
+            try:
+                with open(path, 'r') as f:
+                    count += sum(1 for _ in f)
+            except OSError:
+                continue
+        return count
+
+
+class VisitorMirror:
+    """Parsed in-memory copy of the S3 visitor document with its ETag"""
+
+    def __init__(self, path=None, max_age=10):
+        self.path = path
+        self.max_age = max_age
+        self.etag = None
+        self.data = None
+        self.checked_at = 0
+        if self.path:
+            self.load_from_disk()
+
+    def age(self):
+        """Seconds since the mirror was last confirmed against S3"""
+        return time.monotonic() - self.checked_at
+
+    def touch(self):
+        """Mark the mirror as confirmed current (S3 answered 304)"""
+        self.checked_at = time.monotonic()
+
+    def update(self, etag, data, body):
+        """Replace the mirror with a freshly read or written document"""
+        self.etag = etag
+        self.data = data
+        self.touch()
+        if self.path and etag:
+            self.save_to_disk(body)
+
+    def invalidate(self):
+        """Drop the mirror so the next read does a full GET"""
+        self.etag = None
+        self.data = None
+        self.checked_at = 0
+
+    def load_from_disk(self):
+        """Restore the mirror persisted by a previous process; it is revalidated before use"""
+        try:
+            with open(self.path, 'r') as f:
+                etag = f.readline().strip()
+                self.data = json.loads(f.read())
+                self.etag = etag or None
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"Warning: Could not load visitor mirror from {self.path}: {e}")
+            self.invalidate()
+
+    def save_to_disk(self, body):
+        """Persist the ETag and raw document for the next process"""
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            fd = os.open(tmp_path, os.O_CREAT | os.O_WRONLY | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w') as f:
+                f.write(self.etag + '\n')
+                f.write(body)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Warning: Could not save visitor mirror to {self.path}: {e}")
 
 
 class VisitorTracker:
@@ -18,13 +366,39 @@ class VisitorTracker:
         self.S3_BUCKET = s3_bucket
         self.VISITOR_COUNT_KEY = s3_key
 
+        # Fail fast instead of hanging page requests when S3 is slow
+        s3_config = Config(
+            connect_timeout=float(os.environ.get('S3_CONNECT_TIMEOUT', 2)),
+            read_timeout=float(os.environ.get('S3_READ_TIMEOUT', 3)),
+            retries={'max_attempts': int(os.environ.get('S3_MAX_ATTEMPTS', 2)), 'mode': 'standard'}
+        )
+
         # Initialize S3 client
         try:
-            self.s3_client = boto3.client('s3')
+            self.s3_client = boto3.client('s3', config=s3_config)
         except Exception as e:
             print(f"Warning: Could not initialize S3 client: {e}")
             self.s3_client = None
 
+        spill_path = os.environ.get('VISITOR_SPILL_PATH') or os.path.join(private_state_dir(), 'visitor_spill.jsonl')
+        self.spill = LocalSpill(
+            spill_path,
+            max_bytes=int(os.environ.get('VISITOR_SPILL_MAX_BYTES', 5 * 1024 * 1024))
+        )
+        # Each worker publishes its breaker state next to the spill file
+        self.breaker = CircuitBreaker(
+            failure_threshold=int(os.environ.get('S3_BREAKER_FAILURES', 3)),
+            reset_timeout=float(os.environ.get('S3_BREAKER_RESET_SECONDS', 30)),
+            state_dir=os.path.dirname(os.path.abspath(spill_path))
+        )
+        self.mirror = VisitorMirror(
+            path=os.environ.get('VISITOR_MIRROR_PATH'),
+            max_age=float(os.environ.get('VISITOR_MIRROR_MAX_AGE', 10))
+        )
+        if self.mirror.data is not None:
+            self.mirror.data = self._normalize_visitor_data(self.mirror.data)
+        self._write_lock = threading.Lock()
+
     def is_private_ip(self, ip_address):
         """Check if IP address is private/local (192.x, 127.x, 172.x, 10.x)"""
         try:
@@ -110,95 +484,143 @@ class VisitorTracker:
                 'is_bot': False
             }
 
+    def _empty_visitor_data(self):
+        """Return an empty visitor data document"""
+        return {
+            'unique_visitors': 0,
+            'total_pageviews': 0,
+            'monthly': {},
+            'daily': {},
+            'ips': {}
+        }
+
+    def _normalize_visitor_data(self, data):
+        """Upgrade older document formats and fill in missing fields"""
+        # Ensure all fields exist for backward compatibility
+        if not isinstance(data, dict):
+            # Convert old simple count to new format
+            data = {
+                'unique_visitors': data if isinstance(data, int) else 0,
+                'total_pageviews': data if isinstance(data, int) else 0
+            }
+        elif 'count' in data and 'unique_visitors' not in data:
+            # Handle old format: {"count": 1}
+            data = {
+                'unique_visitors': data.get('count', 0),
+                'total_pageviews': data.get('count', 0)
+            }
+
+        # Initialize new fields if missing
+        data.setdefault('unique_visitors', 0)
+        data.setdefault('total_pageviews', 0)
+        data.setdefault('monthly', {})
+        data.setdefault('daily', {})
+        data.setdefault('ips', {})
+
+        # Ensure monthly/daily have proper structure
+        for period in data.get('monthly', {}):
+            if not isinstance(data['monthly'][period], dict):
+                data['monthly'][period] = {'unique_visitors': data['monthly'][period], 'pageviews': data['monthly'][period]}
+            # Ensure pages field exists for backward compatibility
+            if 'pages' not in data['monthly'][period]:
+                data['monthly'][period]['pages'] = {}
+
+        for period in data.get('daily', {}):
+            if not isinstance(data['daily'][period], dict):
+                data['daily'][period] = {'unique_visitors': data['daily'][period], 'pageviews': data['daily'][period]}
+            # Ensure pages field exists for backward compatibility
+            if 'pages' not in data['daily'][period]:
+                data['daily'][period]['pages'] = {}
+
+        return data
+
+    def _fetch_visitor_data(self):
+        """Revalidate the mirror against S3 and return the current document
+
+        Raises on storage errors. The returned document is the shared mirror
+        copy and must be treated as read-only; track_visitor writes to a copy.
+        Breaker success/failure is recorded here, around the real S3 call.
+        """
+        mirror = self.mirror
+        request_args = {'Bucket': self.S3_BUCKET, 'Key': self.VISITOR_COUNT_KEY}
+        if mirror.data is not None and mirror.etag:
+            request_args['IfNoneMatch'] = mirror.etag
+
+        try:
+            response = self.s3_client.get_object(**request_args)
+            content = response['Body'].read()
+        except self.s3_client.exceptions.NoSuchKey:
+            self.breaker.record_success()
+            mirror.invalidate()
+            return self._empty_visitor_data()
+        except ClientError as e:
+            # Unchanged since our copy: skip the body transfer and the parse
+            if e.response.get('ResponseMetadata', {}).get('HTTPStatusCode') == 304:
+                self.breaker.record_success()
+                mirror.touch()
+                return mirror.data
+            self.breaker.record_failure()
+            raise
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+
+        if isinstance(content, bytes):
+            content = content.decode('utf-8')
+        data = self._normalize_visitor_data(json.loads(content))
+        mirror.update(response.get('ETag'), data, content)
+        return data
+
+    def _put_visitor_data(self, data):
+        """Write visitor data to S3, raising on storage errors"""
+        json_string = json.dumps(data)
+        try:
+            response = self.s3_client.put_object(
+                Bucket=self.S3_BUCKET,
+                Key=self.VISITOR_COUNT_KEY,
+                Body=json_string,
+                ContentType='application/json'
+            )
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        self.mirror.update(response.get('ETag'), data, json_string)
+
     def load_visitor_data(self):
         """Load visitor data from S3 with IP tracking"""
         if not self.s3_client:
-            return {
-                'unique_visitors': 0,
-                'total_pageviews': 0,
-                'monthly': {},
-                'daily': {},
-                'ips': {}
-            }
+            return self._empty_visitor_data()
+
+        # Recently confirmed copy: no S3 call, so nothing for the breaker to count
+        if self.mirror.data is not None and self.mirror.age() < self.mirror.max_age:
+            return self.mirror.data
+
+        # While S3 is unavailable, a stale mirror beats an empty dashboard
+        if not self.breaker.allow_request():
+            return self.mirror.data or self._empty_visitor_data()
 
         try:
-            response = self.s3_client.get_object(Bucket=self.S3_BUCKET, Key=self.VISITOR_COUNT_KEY)
-            body = response['Body']
-            content = body.read()
-            if isinstance(content, bytes):
-                content = content.decode('utf-8')
-            data = json.loads(content)
-
-            # Ensure all fields exist for backward compatibility
-            if not isinstance(data, dict):
-                # Convert old simple count to new format
-                data = {
-                    'unique_visitors': data if isinstance(data, int) else 0,
-                    'total_pageviews': data if isinstance(data, int) else 0
-                }
-            elif 'count' in data and 'unique_visitors' not in data:
-                # Handle old format: {"count": 1}
-                data = {
-                    'unique_visitors': data.get('count', 0),
-                    'total_pageviews': data.get('count', 0)
-                }
-
-            # Initialize new fields if missing
-            data.setdefault('unique_visitors', 0)
-            data.setdefault('total_pageviews', 0)
-            data.setdefault('monthly', {})
-            data.setdefault('daily', {})
-            data.setdefault('ips', {})
-
-            # Ensure monthly/daily have proper structure
-            for period in data.get('monthly', {}):
-                if not isinstance(data['monthly'][period], dict):
-                    data['monthly'][period] = {'unique_visitors': data['monthly'][period], 'pageviews': data['monthly'][period]}
-                # Ensure pages field exists for backward compatibility
-                if 'pages' not in data['monthly'][period]:
-                    data['monthly'][period]['pages'] = {}
-
-            for period in data.get('daily', {}):
-                if not isinstance(data['daily'][period], dict):
-                    data['daily'][period] = {'unique_visitors': data['daily'][period], 'pageviews': data['daily'][period]}
-                # Ensure pages field exists for backward compatibility
-                if 'pages' not in data['daily'][period]:
-                    data['daily'][period]['pages'] = {}
-
-            return data
-        except self.s3_client.exceptions.NoSuchKey:
-            return {
-                'unique_visitors': 0,
-                'total_pageviews': 0,
-                'monthly': {},
-                'daily': {},
-                'ips': {}
-            }
+            return self._fetch_visitor_data()
         except Exception as e:
             print(f"Warning: Could not load visitor data from S3: {e}")
-            return {
-                'unique_visitors': 0,
-                'total_pageviews': 0,
-                'monthly': {},
-                'daily': {},
-                'ips': {}
-            }
+            return self.mirror.data or self._empty_visitor_data()
 
     def save_visitor_data(self, data):
-        """Save visitor data to S3"""
+        """Save visitor data to S3, returning True on success
+
+        Callers check the circuit breaker first; this always attempts the write.
+        """
         if not self.s3_client:
-            return
+            return False
 
         try:
-            json_string = json.dumps(data)
-            self.s3_client.put_object(
-                Bucket=self.S3_BUCKET,
-                Key=self.VISITOR_COUNT_KEY,
-                Body=json_string,
-                ContentType='application/json'
-            )
+            self._put_visitor_data(data)
         except Exception as e:
             print(f"Warning: Could not save visitor data to S3: {e}")
+            return False
+        return True
 
     def track_visitor(self, client_ip, user_agent_string=None, page_visited=None):
         """Track a visitor with IP-based counting and user agent analysis"""
@@ -234,13 +656,79 @@ class VisitorTracker:
         else:
             page_name = 'Unknown'
 
+        event = {
+            'timestamp': datetime.now().isoformat(),
+            'ip': client_ip,
+            'user_agent': user_agent_info,
+            'page': page_name
+        }
+
+        if not self.s3_client:
+            return
+
+        # Fail fast while S3 is unhealthy; the visit is replayed later
+        if not self.breaker.allow_request():
+            self.spill.append(event)
+            return
+
+        with self._write_lock:
+            try:
+                # Always revalidate before writing; a 304 still skips the parse
+                current_data = self._fetch_visitor_data()
+            except Exception as e:
+                print(f"Warning: Could not load visitor data from S3, spilling visit locally: {e}")
+                self.spill.append(event)
+                return
+
+            pending, batch = self.spill.claim()
+            # The mirror only moves forward once the write succeeds
+            visitor_data = self._copy_for_visits(current_data, pending + [event])
+            for spilled_event in pending:
+                self.apply_visit(visitor_data, spilled_event)
+            self.apply_visit(visitor_data, event)
+
+            if not self.save_visitor_data(visitor_data):
+                # Claimed batches stay on disk for the next replay
+                self.spill.release(batch)
+                self.spill.append(event)
+                return
+            self.spill.commit(batch)
+
+        if pending:
+            print(f"Replayed {len(pending)} spilled visits into S3")
+
+    def _copy_for_visits(self, visitor_data, events):
+        """Copy the parts of the document apply_visit changes for these events
+
+        Cheaper than a deep copy of the whole document: only the top level,
+        the touched IP entries and the touched month/day buckets are copied.
+        """
+        data = dict(visitor_data)
+        data['ips'] = dict(visitor_data['ips'])
+        data['monthly'] = dict(visitor_data['monthly'])
+        data['daily'] = dict(visitor_data['daily'])
+
+        for event in events:
+            timestamp = datetime.fromisoformat(event['timestamp'])
+            ip = event['ip']
+            if ip in data['ips'] and data['ips'][ip] is visitor_data['ips'].get(ip):
+                data['ips'][ip] = copy.deepcopy(visitor_data['ips'][ip])
+            for period, key in (('monthly', timestamp.strftime('%Y-%m')), ('daily', timestamp.strftime('%Y-%m-%d'))):
+                if key in data[period] and data[period][key] is visitor_data[period].get(key):
+                    data[period][key] = copy.deepcopy(visitor_data[period][key])
+        return data
+
+    def apply_visit(self, visitor_data, event):
+        """Apply a single visit event to the visitor data document"""
+        client_ip = event['ip']
+        user_agent_info = event['user_agent']
+        page_name = event['page']
+
         # Get current date info
-        now = datetime.now()
+        now = datetime.fromisoformat(event['timestamp'])
         current_month = now.strftime('%Y-%m')
         current_day = now.strftime('%Y-%m-%d')
 
-        # Load existing data
-        visitor_data = self.load_visitor_data()
         # Track IP visits
         if client_ip not in visitor_data['ips']:
             visitor_data['ips'][client_ip] = {
@@ -369,8 +857,17 @@ class VisitorTracker:
             visitor_data['daily'][current_day]['pages'][page_name] = 0
         visitor_data['daily'][current_day]['pages'][page_name] += 1
 
-        # Save updated data
-        self.save_visitor_data(visitor_data)
+
+    def storage_health(self):
+        """Get S3 circuit breaker state of every worker and the local spill for operators"""
+        workers = {status['pid']: status for status in CircuitBreaker.all_workers(self.breaker.state_dir)}
+        workers[os.getpid()] = self.breaker.status()
+        return {
+            'pid': os.getpid(),
+            'workers': [workers[pid] for pid in sorted(workers)],
+            'spilled_visits': self.spill.pending(),
+            'dropped_visits': self.spill.dropped
+        }
 
     def get_stats_for_api(self):
         """Get visitor statistics for JSON API"""